@@ -9,11 +9,12 @@ Generate a short-form educational video series:
 """
 
 import argparse
+import hashlib
 import json
 import os
 import sys
 from pathlib import Path
-from typing import List
+from typing import Any, Dict, List, Optional
 import re
 
 # Best-effort load of environment variables from repo root `.env`
@@ -25,6 +26,15 @@ try:
 except Exception:
     pass
 
+# Support both package and script execution
+try:
+    from ..utils import scheduler  # type: ignore
+except Exception:
+    _SRC_DIR = Path(__file__).resolve().parents[1]
+    if str(_SRC_DIR) not in sys.path:
+        sys.path.insert(0, str(_SRC_DIR))
+    from utils import scheduler  # type: ignore
+
 
 def _require_env(key: str) -> str:
     """Fetch a required environment variable.
@@ -68,7 +78,39 @@ def _get_openai_client():
     return OpenAI(api_key=api_key)
 
 
-def _call_openai_json(input_text: str, model: str) -> str:
+def _record_usage(response: Any, usage: Optional[Dict[str, int]]) -> None:
+    """Copy token counts (including cached prompt tokens) into `usage`.
+
+    Handles both the Responses API shape (`input_tokens`,
+    `input_tokens_details.cached_tokens`) and the Chat Completions shape
+    (`prompt_tokens`, `prompt_tokens_details.cached_tokens`). Missing fields
+    are reported as 0; nothing is recorded when `usage` is None.
+    """
+    if usage is None:
+        return
+    u = getattr(response, "usage", None)
+    if u is None:
+        return
+    input_tokens = getattr(u, "input_tokens", None)
+    details = getattr(u, "input_tokens_details", None)
+    output_tokens = getattr(u, "output_tokens", None)
+    if input_tokens is None:
+        input_tokens = getattr(u, "prompt_tokens", None)
+        details = getattr(u, "prompt_tokens_details", None)
+        output_tokens = getattr(u, "completion_tokens", None)
+    usage["input_tokens"] = int(input_tokens or 0)
+    usage["cached_input_tokens"] = int(getattr(details, "cached_tokens", 0) or 0)
+    usage["output_tokens"] = int(output_tokens or 0)
+
+
+def _call_openai_json(
+    input_text: str,
+    model: str,
+    instructions: Optional[str] = None,
+    usage: Optional[Dict[str, int]] = None,
+    priority: str = scheduler.INTERACTIVE,
+    tenant: str = "default",
+) -> str:
     """Send instructions and retrieve strict-JSON text from OpenAI.
 
     Strategy:
@@ -76,9 +118,20 @@ def _call_openai_json(input_text: str, model: str) -> str:
     2) Otherwise, concatenate any textual content blocks
     3) Fall back to Chat Completions v1 if Responses fails
 
+    `instructions` are sent as the system/developer message ahead of
+    `input_text`, with a `prompt_cache_key` derived from their hash. Keep
+    them static across calls, and above the provider's 1024-token caching
+    minimum, so the shared prefix is served from the prompt cache. Both
+    attempts run inside one scheduler slot for `priority`/`tenant`.
+
     Args:
-        input_text: Fully-built instruction + user content to send.
+        input_text: User content to send (variable part of the request).
         model: Model name (e.g., "gpt-5").
+        instructions: Optional static system/developer instructions.
+        usage: Optional dict filled with `input_tokens`,
+            `cached_input_tokens` and `output_tokens` from the response.
+        priority: Scheduler class, "interactive" or "bulk".
+        tenant: Tenant name used for fair share within the class.
 
     Returns:
         Raw string response (expected to be JSON text), not parsed.
@@ -86,44 +139,135 @@ def _call_openai_json(input_text: str, model: str) -> str:
     Raises:
         RuntimeError: If both calls fail.
     """
-    # Try v1 Responses
-    try:
-        client = _get_openai_client()
-        r = client.responses.create(model=model, input=input_text)
-        # Fast path
-        if isinstance(getattr(r, "output_text", None), str) and r.output_text.strip():
-            return r.output_text.strip()
-        # Robust scrape: handle both 'output_text' and potential 'text' blocks
-        chunks: List[str] = []
-        for item in getattr(r, "output", []) or []:
-            for c in getattr(item, "content", []) or []:
-                t = getattr(c, "type", "")
-                if t in ("output_text", "text"):
-                    val = getattr(c, "text", None) or getattr(c, "value", None) or ""
-                    if val:
-                        chunks.append(val)
-        if chunks:
-            return "".join(chunks).strip()
-    except Exception:
-        pass  # fall through
-
-    # Fallback to v1 Chat Completions (client.chat.completions)
-    try:
-        client = _get_openai_client()
-        chat = client.chat.completions.create(
-            model=model,
-            temperature=0,
-            messages=[
-                {"role": "system", "content": "Return ONLY valid JSON as plain text. No Markdown."},
-                {"role": "user", "content": input_text},
-            ],
-        )
-        return chat.choices[0].message.content
-    except Exception as exc:
-        raise RuntimeError(f"OpenAI request failed: {exc}") from exc
-
-
-UGC_SINGLE_SCRIPT_PROMPT_TEMPLATE = """
+    # Route requests sharing the same instructions to the same prompt cache
+    extra_body: Dict[str, Any] = {}
+    if instructions:
+        cache_key = "ugc-" + hashlib.sha256(instructions.encode("utf-8")).hexdigest()[:16]
+        extra_body["prompt_cache_key"] = cache_key
+
+    with scheduler.slot(priority, tenant):
+        # Try v1 Responses
+        try:
+            client = _get_openai_client()
+            kwargs: Dict[str, Any] = {"model": model, "input": input_text}
+            if instructions:
+                kwargs["instructions"] = instructions
+                kwargs["extra_body"] = extra_body
+            r = client.responses.create(**kwargs)
+            _record_usage(r, usage)
+            # Fast path
+            if isinstance(getattr(r, "output_text", None), str) and r.output_text.strip():
+                return r.output_text.strip()
+            # Robust scrape: handle both 'output_text' and potential 'text' blocks
+            chunks: List[str] = []
+            for item in getattr(r, "output", []) or []:
+                for c in getattr(item, "content", []) or []:
+                    t = getattr(c, "type", "")
+                    if t in ("output_text", "text"):
+                        val = getattr(c, "text", None) or getattr(c, "value", None) or ""
+                        if val:
+                            chunks.append(val)
+            if chunks:
+                return "".join(chunks).strip()
+        except Exception:
+            pass  # fall through
+
+        # Fallback to v1 Chat Completions (client.chat.completions)
+        try:
+            client = _get_openai_client()
+            system = "Return ONLY valid JSON as plain text. No Markdown."
+            if instructions:
+                system = f"{system}\n\n{instructions}"
+            chat = client.chat.completions.create(
+                model=model,
+                temperature=0,
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": input_text},
+                ],
+                extra_body=extra_body or None,
+            )
+            _record_usage(chat, usage)
+            return chat.choices[0].message.content
+        except Exception as exc:
+            raise RuntimeError(f"OpenAI request failed: {exc}") from exc
+
+
+# Worked example embedded in the instructions. Built with json.dumps so the
+# example is itself valid JSON (newlines inside scripts become "\n" escapes),
+# and every spoken line follows the 60-character rule it illustrates.
+_WORKED_EXAMPLE = {
+    "topic": {
+        "video_topic": "Why the sky is blue (and sunsets are orange)",
+        "topic_number": 1,
+    },
+    "characters": [
+        {
+            "id": "charA",
+            "name": "Maya Chen",
+            "voice_style": "natural, witty, a little conspiratorial",
+        }
+    ],
+    "script": {
+        "script no.": "1,2,3",
+        "script 1": "\n".join(
+            [
+                "Okay, confession: I failed a quiz because of the sky.",
+                "The question was simple. Why is the sky blue?",
+                "I wrote: because it reflects the ocean.",
+                "My teacher laughed so hard she had to sit down.",
+                "So here's what actually happens.",
+                "Sunlight looks white, but it's every color mixed.",
+                "When it hits our air, it bumps into gas molecules.",
+                "Those molecules scatter short wavelengths more.",
+                "Blue is short. Red is long.",
+                "So blue gets bounced all over the sky.",
+                "It comes at you from every direction at once.",
+                "The ocean? Mostly innocent.",
+                "Scroll for next part to know about the next topic.",
+            ]
+        ),
+        "script 2": "\n".join(
+            [
+                "Welcome to my series where I finally get the sky.",
+                "Unpopular opinion: the sky should be purple.",
+                "Hear me out. Violet is even shorter than blue.",
+                "So violet should scatter even more.",
+                "So why isn't the whole sky violet?",
+                "Three reasons, and the last one is on you.",
+                "One: the sun sends out less violet to begin with.",
+                "Two: some violet gets soaked up high in the air.",
+                "Three: your eyes are way more tuned to blue.",
+                "Your brain mixes it all and says, yep, blue.",
+                "So technically the sky is a little purple.",
+                "You're just not built to see it.",
+                "Tell me I'm wrong in the comments.",
+                "Scroll for next part to know about the next topic.",
+            ]
+        ),
+        "script 3": "\n".join(
+            [
+                "Welcome back to my series where the sky lies to us.",
+                "POV: you're watching the sunset with a friend.",
+                "They say the colors are just pollution.",
+                "It's not. Mostly. It's distance.",
+                "At sunset, the light reaches you at a low angle.",
+                "It travels through way more air than at noon.",
+                "All that air scatters the blue out sideways.",
+                "What's left is the long stuff. Orange. Red.",
+                "Pink, if you're lucky.",
+                "So a sunset is the sky running out of blue.",
+                "Romantic? Yes. Physics? Also yes.",
+                "Next time someone says the sky is blue, say:",
+                "only at lunch.",
+                "Scroll for next part to know about the next topic.",
+            ]
+        ),
+    },
+}
+
+
+UGC_SINGLE_SCRIPT_INSTRUCTIONS = """
 You are a UGC short-form SINGLE-SCRIPT generator for 30s - 60s, vertical (9:16) TikTok/Reels.
 You ONLY output one JSON object with exactly three top-level keys: "topic", "characters", and "script".
 Never include meta/brief/beats/on-screen text/alt hooks/hashtags/advice—scripts only.
@@ -137,7 +281,7 @@ STYLE & HOOKS
 - Lean into engagement levers (pick 1–2 max per script):
 - There can be multiple lines for a single video; make sure each stays under 500 characters.
 - When something technical or science comes up, create narrative context before explaining it—the script must feel like a story.
-- You are generating script for {count} video{plural}, so make every part hooky and bingeable.
+- You are generating scripts for a multi-part series (the exact count is given after source_text), so make every part hooky and bingeable.
 - Every script must be in plain English. Do not label speakers (no "Character 1"), and avoid brackets—only spoken lines.
 - For parts after the first, include spoken hooks such as "welcome to my series where ..." tailored to the topic.
 - Spoken hooks only—never describe visual hooks.
@@ -150,7 +294,7 @@ Every script must rotate between these engagement levers (pick 1–2 per part):
   • Micro-mystery + reveal loop
   • Hyper-specific relatability (POV framing)
 - Finish each part with the spoken call-to-action: "scroll for next part to know about the next topic."
-Use real newlines (no "\\n" literals).
+Separate lines inside a script with standard JSON "\\n" escapes (as in the worked example); never double-escape them.
 
 GUARDRAILS (concise)
 - No fabricated facts or unverifiable claims from 'source_text'.
@@ -159,46 +303,85 @@ GUARDRAILS (concise)
 
 OUTPUT FORMAT (STRICT) — return ONE JSON object and NOTHING else:
 
-{{
-  "topic": {{
+{
+  "topic": {
     "video_topic": "short descriptive theme derived from source_text or a truthful generic theme",
     "topic_number": 1
-  }},
+  },
   "characters": [
-    {{
+    {
       "id": "charA",
       "name": "Creator",
       "voice_style": "derive from source_text if present; else 'natural, witty'"
-    }}
+    }
   ],
-  "script": {{
-    "script no.": "1,2,3,...,{count}",
+  "script": {
+    "script no.": "1,2,3,...,N",
     "script 1": "",
     "...": "...",
-    "script {count}": ""
-  }}
-}}
+    "script N": ""
+  }
+}
 
 VALIDATION
 - Output must be valid JSON (double quotes, no trailing commas).
-- Only include the keys/fields shown above. Exactly one character. Exactly {count} scripts.
+- Only include the keys/fields shown above. Exactly one character. Exactly N scripts, where N is the count requested after source_text.
+
+WORKED EXAMPLE (style reference only — never copy its topic, facts, or lines)
+Given source_text about why the sky is blue and a request for N = 3, a strong answer looks like:
+
+""" + json.dumps(_WORKED_EXAMPLE, ensure_ascii=False, indent=2) + """
+
+Why this example works (apply the same moves to the real source_text):
+- Script 1 opens with a confessional hook that makes sense with the sound off, then turns the explanation into a short story.
+- Script 2 uses a contrarian take plus a comment invite. It opens with the series hook because it is not the first part.
+- Script 3 uses POV relatability and a micro-mystery with a payoff. Each part stands alone but rewards bingeing.
+- Every line is short and spoken. There are no speaker labels, brackets, stage directions, or visual cues.
+- Every part ends with the exact call-to-action line.
+- The character is one believable person, and voice_style matches how the lines read.
+
+COMMON MISTAKES TO AVOID
+- Returning Markdown fences, commentary, or more than one JSON object.
+- Writing lecture-style paragraphs instead of a story with a hook, a turn, and a payoff.
+- Reusing the same engagement lever in every part instead of rotating them.
+- Inventing statistics, studies, quotes, or dates that are not in source_text.
+- Adding keys such as "hashtags", "title", "beats", or "notes".
+- Numbering scripts out of order, skipping numbers, or returning fewer or more than N scripts.
 """
 
 
-def _build_generation_prompt(count: int) -> str:
-    """Fill the base prompt template with the desired script count.
+def _build_generation_input(user_prompt: str, count: int) -> str:
+    """Build the variable tail of the request (source text and script count).
+
+    The static `UGC_SINGLE_SCRIPT_INSTRUCTIONS` are sent separately as the
+    system/developer message so they form a byte-identical prefix across
+    requests and can be served from the provider's prompt cache. Everything
+    that changes per call lives here, at the end of the request.
 
     Args:
+        user_prompt: Source text or topic description to condition generation.
         count: Number of scripts to request in the output schema.
 
     Returns:
-        The finalized instruction string sent to the model.
+        The user-message string sent after the static instructions.
     """
     plural = "s" if count != 1 else ""
-    return UGC_SINGLE_SCRIPT_PROMPT_TEMPLATE.format(count=count, plural=plural)
+    return (
+        "source_text (from user):\n"
+        f"{user_prompt}\n\n"
+        f"You are generating scripts for {count} video{plural}. "
+        f"Here N = {count}: return exactly {count} script{plural} "
+        "inside the strict JSON schema above."
+    )
 
 
-def generate_scripts(user_prompt: str, count: int = 10, model: str = "gpt-5") -> List[str]:
+def generate_scripts(
+    user_prompt: str,
+    count: int = 10,
+    model: str = "gpt-5",
+    priority: str = scheduler.INTERACTIVE,
+    tenant: str = "default",
+) -> List[str]:
     """Generate N short-form scripts from a user prompt.
 
     The model is instructed to return a strict JSON object with a `script` field
@@ -211,6 +394,8 @@ def generate_scripts(user_prompt: str, count: int = 10, model: str = "gpt-5") ->
         user_prompt: Source text or topic description to condition generation.
         count: Number of scripts to return.
         model: OpenAI model name.
+        priority: Scheduler class for the OpenAI call ("interactive" or "bulk").
+        tenant: Tenant name used for fair share within the class.
 
     Returns:
         List of `count` script strings.
@@ -218,16 +403,16 @@ def generate_scripts(user_prompt: str, count: int = 10, model: str = "gpt-5") ->
     if count <= 0:
         return []
 
-    # Build a single input per Responses API style
-    instructions = _build_generation_prompt(count)
-    input_text = (
-        f"{instructions}\n\n"
-        "source_text (from user):\n"
-        f"{user_prompt}\n\n"
-        f"Return exactly {count} scripts inside the strict JSON schema above."
-    )
+    # Static instructions first (cacheable prefix), variable input last
+    input_text = _build_generation_input(user_prompt, count)
 
-    raw = _call_openai_json(input_text=input_text, model=model)
+    raw = _call_openai_json(
+        input_text=input_text,
+        model=model,
+        instructions=UGC_SINGLE_SCRIPT_INSTRUCTIONS,
+        priority=priority,
+        tenant=tenant,
+    )
 
     if not raw:
         raise RuntimeError("Empty response from model")
@@ -268,30 +453,42 @@ def generate_scripts(user_prompt: str, count: int = 10, model: str = "gpt-5") ->
     return result
 
 
-def generate_series(user_prompt: str, count: int = 10, model: str = "gpt-5") -> dict:
+def generate_series(
+    user_prompt: str,
+    count: int = 10,
+    model: str = "gpt-5",
+    priority: str = scheduler.INTERACTIVE,
+    tenant: str = "default",
+) -> dict:
     """Generate topic metadata and scripts together.
 
     Args:
         user_prompt: Source text or topic description to condition generation.
         count: Number of scripts to request.
         model: OpenAI model name.
+        priority: Scheduler class for the OpenAI call ("interactive" or "bulk").
+        tenant: Tenant name used for fair share within the class.
 
     Returns:
         Dict with keys:
           - "topic": normalized topic string (may be empty on parsing failures)
           - "scripts": list of `count` scripts (padded/truncated)
+          - "usage": token counts from the API response, including
+            `cached_input_tokens` (empty if the API reported none)
     """
-    # Build single input text once
-    instructions = _build_generation_prompt(count)
-    input_text = (
-        f"{instructions}\n\n"
-        "source_text (from user):\n"
-        f"{user_prompt}\n\n"
-        f"Return exactly {count} scripts inside the strict JSON schema above."
+    # Static instructions first (cacheable prefix), variable input last
+    input_text = _build_generation_input(user_prompt, count)
+
+    usage: Dict[str, int] = {}
+    raw = _call_openai_json(
+        input_text=input_text,
+        model=model,
+        instructions=UGC_SINGLE_SCRIPT_INSTRUCTIONS,
+        usage=usage,
+        priority=priority,
+        tenant=tenant,
     )
 
-    raw = _call_openai_json(input_text=input_text, model=model)
-
     if not raw:
         raise RuntimeError("Empty response from model")
 
@@ -329,7 +526,7 @@ def generate_series(user_prompt: str, count: int = 10, model: str = "gpt-5") ->
     elif len(scripts) < count:
         scripts = scripts + [""] * (count - len(scripts))
 
-    return {"topic": topic, "scripts": scripts}
+    return {"topic": topic, "scripts": scripts, "usage": usage}
 
 
 def _parse_args(argv: List[str]) -> argparse.Namespace:
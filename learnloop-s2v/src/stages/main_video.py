@@ -4,16 +4,21 @@ End-to-end driver for generating scripts and calling FAL to produce avatar video
 Flow:
 1) Load `.env` for keys
 2) Optionally skip OpenAI and send a single script directly to FAL (`--direct-to-fal`)
-3) Otherwise: generate a series (topic + N scripts) via OpenAI
+3) Otherwise: generate a series (topic + N scripts) via OpenAI, then check each
+   script's estimated spoken length and split overlong ones
 4) Save scripts to a timestamped folder; optionally submit each to FAL
+   (or several per render with `--batch-size`, split locally at the pauses),
+   skipping near-duplicates of past renders found in the similarity index
 5) Download resulting videos to the same folder
 """
 
 import argparse
 import json
 import os
+import shutil
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List
 
@@ -32,6 +37,10 @@ import requests
 try:
     from .gen_script import generate_series  # type: ignore
     from ..utils import fal as fal_wrap  # type: ignore
+    from ..utils import duration  # type: ignore
+    from ..utils import media  # type: ignore
+    from ..utils import scheduler  # type: ignore
+    from ..utils import similarity  # type: ignore
 except Exception:
     # Fallback when run directly: add src/ to sys.path
     _SRC_DIR = Path(__file__).resolve().parents[1]
@@ -39,6 +48,14 @@ except Exception:
         sys.path.insert(0, str(_SRC_DIR))
     from gen_script import generate_series  # type: ignore
     from utils import fal as fal_wrap  # type: ignore
+    from utils import duration  # type: ignore
+    from utils import media  # type: ignore
+    from utils import scheduler  # type: ignore
+    from utils import similarity  # type: ignore
+
+# Spoken pause inserted between scripts in batched renders. The TTS voice
+# renders the ellipses as a long silence that `media.detect_silences` finds.
+BATCH_SEPARATOR = "\n\n... ... ...\n\n"
 
 
 def _slugify(value: str) -> str:
@@ -93,6 +110,73 @@ def _parse_args(argv: List[str]) -> argparse.Namespace:
         action="store_true",
         help="Bypass OpenAI generation and send the prompt directly to FAL (single video)",
     )
+    p.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Join up to N scripts into one FAL render and split it locally at the pauses (default: 1, no batching)",
+    )
+    p.add_argument(
+        "--similar-threshold",
+        type=float,
+        default=0.7,
+        help="Flag scripts at least this similar to a past render (0-1, default: 0.7, 0 disables)",
+    )
+    p.add_argument(
+        "--reuse-similar",
+        action="store_true",
+        help="Copy the matching past render instead of submitting a near-duplicate script",
+    )
+    p.add_argument(
+        "--render-index",
+        type=str,
+        default=None,
+        help="Path to the render similarity index (default: <out-dir>/render_index.json)",
+    )
+    p.add_argument(
+        "--priority",
+        choices=list(scheduler.PRIORITIES),
+        default=scheduler.INTERACTIVE,
+        help="Scheduler class for OpenAI/FAL calls; use 'bulk' for backfills (default: interactive)",
+    )
+    p.add_argument("--tenant", type=str, default="default", help="Tenant name for fair scheduling")
+    p.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="FAL renders this run submits at once; the shared --slots limit still applies (default: 1)",
+    )
+    p.add_argument(
+        "--slots",
+        type=int,
+        default=4,
+        help="OpenAI/FAL calls in flight across all runs sharing --out-dir (default: 4)",
+    )
+    p.add_argument(
+        "--interactive-slots",
+        type=int,
+        default=1,
+        help="Slots of --slots that bulk runs may never use (default: 1)",
+    )
+    p.add_argument("--min-seconds", type=float, default=30, help="Target minimum spoken length per part (default: 30)")
+    p.add_argument("--max-seconds", type=float, default=60, help="Target maximum spoken length per part (default: 60)")
+    p.add_argument(
+        "--no-split",
+        action="store_true",
+        help="Only flag scripts longer than --max-seconds instead of splitting them into more parts",
+    )
+    p.add_argument(
+        "--max-render-minutes",
+        type=float,
+        default=None,
+        help="Estimated render-time budget per series; parts past the budget are not submitted",
+    )
+    p.add_argument(
+        "--voice-rates",
+        type=str,
+        default=None,
+        help="Path to the calibrated speaking rates file (default: <out-dir>/voice_rates.json)",
+    )
     p.add_argument(
         "--fal-model",
         type=str,
@@ -111,6 +195,8 @@ def main(argv: List[str]) -> int:
     args = _parse_args(argv)
 
     out_root = Path(args.out_dir)
+    # All runs sharing out_root draw OpenAI/FAL slots from one scheduler
+    scheduler.use_shared_dir(out_root / ".scheduler", args.slots, args.interactive_slots)
 
     prompt = args.prompt
     if not prompt:
@@ -156,6 +242,8 @@ def main(argv: List[str]) -> int:
             arguments=payload,
             with_logs=True,
             on_queue_update=_on_update,
+            priority=args.priority,
+            tenant=args.tenant,
         )
 
         data = result.get("data") if isinstance(result, dict) else None
@@ -177,13 +265,42 @@ def main(argv: List[str]) -> int:
         print(f"Test video saved to: {dest}")
         return 0
 
-    series = generate_series(user_prompt=prompt, count=args.count, model=args.model)
+    series = generate_series(
+        user_prompt=prompt,
+        count=args.count,
+        model=args.model,
+        priority=args.priority,
+        tenant=args.tenant,
+    )
     topic = series.get("topic") or ""
     scripts = [s for s in (series.get("scripts") or []) if s]
     if not scripts:
         print("No scripts generated", file=sys.stderr)
         return 1
 
+    # Check estimated spoken length against the target window before rendering
+    rates_path = Path(args.voice_rates) if args.voice_rates else out_root / "voice_rates.json"
+    rates = duration.SpeechRates(rates_path)
+    words_per_second = rates.words_per_second(args.voice)
+    checked: List[str] = []
+    for idx, s in enumerate(scripts, 1):
+        est = rates.estimate(s, args.voice)
+        parts = [s]
+        if est > args.max_seconds and not args.no_split:
+            parts = duration.split_script(s, args.max_seconds, words_per_second)
+            if len(parts) > 1:
+                print(f"Script {idx} is ~{est:.0f}s, over {args.max_seconds:g}s; split into {len(parts)} parts")
+        for part in parts:
+            est = rates.estimate(part, args.voice)
+            if not args.min_seconds <= est <= args.max_seconds:
+                print(
+                    f"Warning: part {len(checked) + 1} is ~{est:.0f}s, "
+                    f"outside the {args.min_seconds:g}-{args.max_seconds:g}s target",
+                    file=sys.stderr,
+                )
+            checked.append(part)
+    scripts = checked
+
     topic_slug = _slugify(topic)
     # Folder name combines timestamp and topic slug for uniqueness and readability
     out_dir = out_root / f"{time.strftime('EP_%Y%m%d_%H%M%S')}_{topic_slug}"
@@ -195,6 +312,17 @@ def main(argv: List[str]) -> int:
         for idx, s in enumerate(scripts, 1):
             f.write(f"[Script {idx}]\n{s}\n\n")
 
+    # Save OpenAI token usage (cached_input_tokens shows prompt-cache hits)
+    usage = series.get("usage") or {}
+    if usage:
+        with open(out_dir / "usage.json", "w", encoding="utf-8") as f:
+            json.dump(usage, f, ensure_ascii=False, indent=2)
+        print(
+            f"OpenAI tokens: {usage.get('input_tokens', 0)} in "
+            f"({usage.get('cached_input_tokens', 0)} cached), "
+            f"{usage.get('output_tokens', 0)} out"
+        )
+
     # Inform user and ask to proceed to FAL submissions
     print(f"Scripts generated and saved to: {script_txt}")
     try:
@@ -243,17 +371,72 @@ def main(argv: List[str]) -> int:
         except Exception:
             pass
 
+    # Check each script against past renders before paying for a new one
+    index = None
+    # Everything besides the text that changes what the render looks/sounds like
+    render_params = {
+        "avatar": args.avatar,
+        "voice": args.voice,
+        "remove_background": bool(args.remove_background),
+        "fal_model": args.fal_model,
+    }
+    if args.similar_threshold > 0:
+        index_path = Path(args.render_index) if args.render_index else out_root / "render_index.json"
+        index = similarity.SimilarityIndex(index_path)
+
+    pending = []
+    reused = 0
+    reused_seconds = 0.0
     for idx, s in enumerate(scripts[:to_send], 1):
+        if index is not None:
+            match, score = index.find(s, render_params)
+            if match and score >= args.similar_threshold:
+                src = Path(match["video"])
+                if args.reuse_similar:
+                    shutil.copy2(src, out_dir / f"{topic_slug}_part-{idx}.mp4")
+                    reused += 1
+                    reused_seconds += match.get("duration") or 0.0
+                    print(f"Script {idx} is {score:.0%} similar to {src}; reusing that render")
+                    continue
+                print(f"Script {idx} is {score:.0%} similar to existing render {src}")
+        pending.append((idx, s))
+
+    # Stop before the series would exceed its estimated render budget
+    if args.max_render_minutes is not None:
+        budget = args.max_render_minutes * 60
+        planned = 0.0
+        for pos, (idx, s) in enumerate(pending):
+            est = rates.estimate(s, args.voice)
+            if planned + est > budget:
+                print(
+                    f"Render budget of {args.max_render_minutes:g} min reached; "
+                    f"not submitting {len(pending) - pos} part(s) from script {idx} on",
+                    file=sys.stderr,
+                )
+                pending = pending[:pos]
+                break
+            planned += est
+        print(f"Estimated render time: ~{planned / 60:.1f} of {args.max_render_minutes:g} min")
+
+    def _render(batch):
+        """Render one batch and return (script, part path, solo) for each part written.
+
+        `solo` is True when the part was its own render, so its duration has
+        no cut-off separator pause and can calibrate the voice's rate.
+        """
+        first, last = batch[0][0], batch[-1][0]
+        label = f"script {first}" if len(batch) == 1 else f"scripts {first}-{last}"
         payload = {
             "avatar": args.avatar,
-            "text": s,
+            "text": BATCH_SEPARATOR.join(s for _, s in batch),
             "voice": args.voice,
         }
         if args.remove_background:
             payload["remove_background"] = True
 
         # Save payload
-        with open(out_dir / f"payload_{idx}.json", "w", encoding="utf-8") as f:
+        payload_name = f"payload_{first}.json" if len(batch) == 1 else f"payload_{first}-{last}.json"
+        with open(out_dir / payload_name, "w", encoding="utf-8") as f:
             json.dump(payload, f, ensure_ascii=False, indent=2)
 
         # Submit to FAL using fal_client and wait synchronously with logs
@@ -262,6 +445,8 @@ def main(argv: List[str]) -> int:
             arguments=payload,
             with_logs=True,
             on_queue_update=_on_update,
+            priority=args.priority,
+            tenant=args.tenant,
         )
 
         # Expecting result like {"data": {"video": {"url": ...}}} or {"video": {"url": ...}}
@@ -271,15 +456,69 @@ def main(argv: List[str]) -> int:
         video = (data or {}).get("video") or {}
         video_url = video.get("url")
         if not video_url:
-            print(f"No video URL in result for script {idx}: {result}", file=sys.stderr)
-            continue
+            print(f"No video URL in result for {label}: {result}", file=sys.stderr)
+            return []
 
-        dest = out_dir / f"{topic_slug}_part-{idx}.mp4"
+        part_paths = [out_dir / f"{topic_slug}_part-{idx}.mp4" for idx, _ in batch]
+        dest = part_paths[0] if len(batch) == 1 else out_dir / f"{topic_slug}_parts-{first}-{last}.mp4"
         try:
             _download(video_url, dest)
         except Exception as exc:
-            print(f"Download failed for script {idx}: {exc}", file=sys.stderr)
+            print(f"Download failed for {label}: {exc}", file=sys.stderr)
+            return []
 
+        if len(batch) > 1:
+            # Split the combined render back into per-part files at the pauses
+            try:
+                gaps = media.detect_silences(dest)
+                total = media.probe_duration(dest)
+                expected = media.expected_boundaries([duration.count_words(s) for _, s in batch], total)
+                # Allow a quarter of the shortest expected part, at least 3s
+                shortest = min(b - a for a, b in zip([0.0, *expected], [*expected, total]))
+                cuts = media.pick_boundaries(gaps, expected, max(3.0, shortest / 4))
+                media.split_video(dest, cuts, part_paths)
+                dest.unlink()
+            except Exception as exc:
+                print(f"Split failed for {label}, combined video kept at {dest}: {exc}", file=sys.stderr)
+                return []
+
+        solo = len(batch) == 1
+        return [(s, path, solo) for (_, s), path in zip(batch, part_paths)]
+
+    # Renders run in a thread pool; the shared scheduler caps what is actually in flight
+    concurrency = max(1, args.concurrency)
+    batch_size = max(1, args.batch_size)
+    batches = [pending[i : i + batch_size] for i in range(0, len(pending), batch_size)]
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for rendered in pool.map(_render, batches):
+            # Measured durations feed the similarity index and voice calibration
+            for s, path, solo in rendered:
+                try:
+                    seconds = media.probe_duration(path)
+                except Exception:
+                    seconds = None
+                if index is not None:
+                    index.add(s, path, render_params, seconds)
+                # Split parts carry part of the BATCH_SEPARATOR pause; keep them out
+                if seconds and solo:
+                    rates.record(args.voice, s, seconds)
+            if index is not None:
+                index.save()
+            rates.save()
+
+    # Shared queue depth plus this run's wait time per scheduler class
+    sched_stats = scheduler.stats()
+    with open(out_dir / "scheduler.json", "w", encoding="utf-8") as f:
+        json.dump(sched_stats, f, indent=2)
+    for priority, st in sched_stats.items():
+        if st["completed"]:
+            print(
+                f"Scheduler [{priority}]: {st['completed']} call(s), "
+                f"avg wait {st['avg_wait_s']:.1f}s, max wait {st['max_wait_s']:.1f}s"
+            )
+
+    if reused:
+        print(f"Reused {reused} existing render(s), ~{reused_seconds / 60:.1f} render-minutes avoided")
     print(f"Outputs saved to: {out_dir}")
     return 0
 
@@ -0,0 +1,131 @@
+"""
+Speech-duration estimates for scripts before they are rendered:
+
+- Estimates spoken length from word count and a per-voice speaking rate
+- Calibrates each voice's rate from measured durations of past renders,
+  persisted in a small JSON file
+- Splits overlong scripts at sentence boundaries into parts that fit a
+  target duration
+"""
+
+import math
+import re
+from pathlib import Path
+from typing import Any, Dict, List
+
+from .io import read_json, update_json
+
+# ~150 words per minute, typical for conversational TTS voices
+DEFAULT_WORDS_PER_SECOND = 2.5
+# Renders needed before a voice's measured rate replaces the default
+MIN_CALIBRATION_SAMPLES = 3
+
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?…])\s+|\n+")
+
+
+def count_words(text: str) -> int:
+    """Count spoken words (runs of letters/digits, apostrophes allowed)."""
+    return len(re.findall(r"[\w']+", text))
+
+
+class SpeechRates:
+    """JSON-backed per-voice speaking rates calibrated from past renders.
+
+    Each voice keeps running totals of words and measured seconds; the rate
+    is their ratio once enough samples exist. Samples recorded by this
+    process are added to the on-disk totals on `save()`, so concurrent runs
+    do not lose each other's calibration.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        try:
+            data = read_json(self.path)
+        except (OSError, ValueError):
+            data = {}  # an unreadable file is moved aside by `save()`
+        self.voices: Dict[str, Dict[str, float]] = data.get("voices") or {}
+        # Samples recorded since the last load/save, not yet on disk
+        self._pending: Dict[str, Dict[str, float]] = {}
+
+    def words_per_second(self, voice: str) -> float:
+        """Calibrated rate for `voice`, or the default if under-sampled."""
+        v = self.voices.get(voice) or {}
+        if v.get("samples", 0) >= MIN_CALIBRATION_SAMPLES and v.get("seconds", 0) > 0:
+            return v["words"] / v["seconds"]
+        return DEFAULT_WORDS_PER_SECOND
+
+    def estimate(self, text: str, voice: str) -> float:
+        """Estimated spoken duration of `text` in seconds."""
+        return count_words(text) / self.words_per_second(voice)
+
+    def record(self, voice: str, text: str, seconds: float) -> None:
+        """Add a measured render duration; call `save()` to persist."""
+        words = count_words(text)
+        if words <= 0 or seconds <= 0:
+            return
+        for totals in (self.voices, self._pending):
+            v = totals.setdefault(voice, {"words": 0, "seconds": 0.0, "samples": 0})
+            v["words"] += words
+            v["seconds"] += seconds
+            v["samples"] += 1
+
+    def save(self) -> None:
+        """Add this process's samples to the file on disk, creating parent
+        folders as needed."""
+
+        def merge(current: Dict[str, Any]) -> Dict[str, Any]:
+            voices = current.get("voices") or {}
+            for voice, delta in self._pending.items():
+                v = voices.setdefault(voice, {"words": 0, "seconds": 0.0, "samples": 0})
+                for key in ("words", "seconds", "samples"):
+                    v[key] = v.get(key, 0) + delta[key]
+            return {"voices": voices}
+
+        data = update_json(self.path, merge, indent=2)
+        self.voices = data["voices"]
+        self._pending = {}
+
+
+def split_script(text: str, max_seconds: float, words_per_second: float) -> List[str]:
+    """Split a script at sentence boundaries into parts of at most `max_seconds`.
+
+    Uses ceil(words / max words) parts and cuts at the sentence boundary
+    closest to each even share of the words, so the last part is not left as
+    a short tail. One more part is added only while sentence lengths make
+    some part overflow; a single sentence longer than the limit is kept whole.
+
+    Args:
+        text: Script text.
+        max_seconds: Upper bound for each part's estimated duration.
+        words_per_second: Speaking rate used for the estimate.
+
+    Returns:
+        List of script parts (the original text if it already fits).
+    """
+    max_words = max_seconds * words_per_second
+    total = count_words(text)
+    if total <= max_words:
+        return [text]
+
+    sentences = [s.strip() for s in _SENTENCE_SPLIT_RE.split(text) if s.strip()]
+    # ends[i] = words spoken once sentence i is finished
+    ends: List[int] = []
+    acc = 0
+    for sentence in sentences:
+        acc += count_words(sentence)
+        ends.append(acc)
+
+    parts: List[str] = [text]
+    for n in range(math.ceil(total / max_words), len(sentences) + 1):
+        cuts: List[int] = []  # index of the last sentence of each part but the final one
+        for k in range(1, n):
+            target = total * k / n
+            first = cuts[-1] + 1 if cuts else 0
+            last = len(sentences) - 1 - (n - k)  # leave a sentence for each later part
+            cuts.append(min(range(first, last + 1), key=lambda i: abs(ends[i] - target)))
+        bounds = list(zip([0, *(c + 1 for c in cuts)], [*cuts, len(sentences) - 1]))
+        parts = ["\n".join(sentences[lo : hi + 1]) for lo, hi in bounds]
+        # Only a lone overlong sentence may exceed the limit
+        if all(lo == hi or count_words(p) <= max_words for (lo, hi), p in zip(bounds, parts)):
+            break
+    return parts
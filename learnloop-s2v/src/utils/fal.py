@@ -4,6 +4,7 @@ Thin wrappers around the `fal_client` SDK with small conveniences:
 - Loads environment variables from the repo-level `.env` (if python-dotenv is available)
 - Validates presence of the FAL API key before every call
 - Normalizes return values to dicts where possible
+- Routes blocking `subscribe` calls through the priority scheduler
 """
 
 import os
@@ -23,6 +24,8 @@ except Exception:
 # Import the FAL client SDK. We type-ignore to avoid requiring local type stubs.
 import fal_client  # type: ignore
 
+from . import scheduler
+
 
 def _require_fal_key() -> None:
     """Raise if neither FAL_KEY nor FAL_API_KEY is present in the environment."""
@@ -35,6 +38,8 @@ def subscribe(
     arguments: Dict[str, Any],
     with_logs: bool = True,
     on_queue_update: Optional[Callable[[Any], None]] = None,
+    priority: str = scheduler.INTERACTIVE,
+    tenant: str = "default",
 ) -> Dict[str, Any]:
     """Submit a request to a FAL model and wait for the result with optional logs.
 
@@ -43,18 +48,21 @@ def subscribe(
         arguments: Payload passed to FAL.
         with_logs: If True, FAL will stream queue/worker logs.
         on_queue_update: Optional callback invoked on queue state changes.
+        priority: Scheduler class, "interactive" or "bulk".
+        tenant: Tenant name used for fair share within the class.
 
     Returns:
         A dict-like result object. If the SDK returns a custom object exposing
         a `.dict()` method, we convert it; otherwise we return the raw value.
     """
     _require_fal_key()
-    result = fal_client.subscribe(
-        model_id,
-        arguments=arguments,
-        with_logs=with_logs,
-        on_queue_update=on_queue_update,
-    )
+    with scheduler.slot(priority, tenant):
+        result = fal_client.subscribe(
+            model_id,
+            arguments=arguments,
+            with_logs=with_logs,
+            on_queue_update=on_queue_update,
+        )
     # Convert to dict if SDK object exposes dict(); otherwise return as-is
     return getattr(result, "dict", lambda: result)()
 
@@ -0,0 +1,101 @@
+"""
+JSON state files shared between concurrent pipeline runs:
+
+- Read-modify-write under an exclusive lock on a `.lock` sidecar file, so
+  runs merge their changes instead of overwriting each other's
+- Writes go to a temp file that replaces the target atomically, so a crash
+  never leaves truncated JSON behind
+"""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator
+
+try:
+    import fcntl  # POSIX only; without it writes are atomic but not merged under a lock
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    """Hold an exclusive flock on `<path>.lock` for the duration of the block."""
+    if fcntl is None:  # pragma: no cover
+        yield
+        return
+    fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # closing the descriptor releases the flock
+
+
+def read_json(path: Path) -> Dict[str, Any]:
+    """Load a JSON object from `path`, or `{}` if it is missing.
+
+    Raises:
+        ValueError: If the file exists but is not a valid JSON object.
+    """
+    path = Path(path)
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"{path} does not contain a JSON object")
+    return data
+
+
+def write_json_atomic(path: Path, data: Dict[str, Any], indent: Any = None) -> None:
+    """Write `data` to a temp file next to `path`, then rename it over `path`."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def update_json(
+    path: Path,
+    merge: Callable[[Dict[str, Any]], Dict[str, Any]],
+    indent: Any = None,
+) -> Dict[str, Any]:
+    """Merge this process's changes into the JSON file at `path`.
+
+    Under an exclusive lock, reads the current contents, passes them to
+    `merge` and atomically writes its result. An unreadable file is moved
+    aside to `<path>.corrupt` rather than silently discarded.
+
+    Args:
+        path: JSON file to update; parent folders are created as needed.
+        merge: Receives the on-disk object (`{}` if absent) and returns the
+            object to write.
+        indent: Passed to `json.dump`.
+
+    Returns:
+        The object that was written.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _file_lock(path):
+        try:
+            current = read_json(path)
+        except ValueError:  # includes json.JSONDecodeError
+            os.replace(path, f"{path}.corrupt")
+            current = {}
+        data = merge(current)
+        write_json_atomic(path, data, indent=indent)
+    return data
@@ -0,0 +1,197 @@
+"""
+Small ffmpeg helpers for post-processing rendered videos:
+
+- Detects silent gaps in a video's audio track (`silencedetect` filter)
+- Picks part boundaries from those gaps, near where each part should end
+- Splits one video into several mp4 files at given timestamps
+- Reads a media file's duration (`ffprobe`)
+
+Requires the `ffmpeg`/`ffprobe` binaries on PATH; they are invoked via subprocess.
+"""
+
+import re
+import shutil
+import subprocess
+from pathlib import Path
+from typing import List, Sequence, Tuple
+
+_SILENCE_START_RE = re.compile(r"silence_start:\s*(-?[0-9.]+)")
+_SILENCE_END_RE = re.compile(r"silence_end:\s*([0-9.]+)")
+
+
+def _require_ffmpeg() -> str:
+    """Return the ffmpeg executable path or raise if it is not installed."""
+    exe = shutil.which("ffmpeg")
+    if not exe:
+        raise RuntimeError("ffmpeg not found on PATH. Install ffmpeg to split videos")
+    return exe
+
+
+def probe_duration(path: Path) -> float:
+    """Return the duration of a media file in seconds.
+
+    Raises:
+        RuntimeError: If ffprobe is missing or fails.
+    """
+    exe = shutil.which("ffprobe")
+    if not exe:
+        raise RuntimeError("ffprobe not found on PATH. Install ffmpeg to read durations")
+    proc = subprocess.run(
+        [exe, "-v", "error", "-show_entries", "format=duration", "-of", "default=nw=1:nk=1", str(path)],
+        capture_output=True,
+        text=True,
+    )
+    try:
+        return float(proc.stdout.strip())
+    except ValueError as exc:
+        raise RuntimeError(f"ffprobe failed for {path}: {proc.stderr.strip()[-500:]}") from exc
+
+
+def detect_silences(
+    path: Path,
+    noise_db: float = -35.0,
+    min_duration: float = 0.8,
+) -> List[Tuple[float, float]]:
+    """Find silent gaps in the audio track of a media file.
+
+    Args:
+        path: Video or audio file to analyze.
+        noise_db: Level (dBFS) below which audio counts as silence.
+        min_duration: Minimum gap length in seconds to report.
+
+    Returns:
+        List of (start, end) tuples in seconds, in playback order. A gap that
+        runs to the end of the file is returned without an end and is dropped.
+
+    Raises:
+        RuntimeError: If ffmpeg is missing or fails.
+    """
+    exe = _require_ffmpeg()
+    proc = subprocess.run(
+        [
+            exe,
+            "-hide_banner",
+            "-nostats",
+            "-i",
+            str(path),
+            "-af",
+            f"silencedetect=noise={noise_db}dB:d={min_duration}",
+            "-f",
+            "null",
+            "-",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg silencedetect failed: {proc.stderr.strip()[-500:]}")
+
+    gaps: List[Tuple[float, float]] = []
+    start = None
+    # ffmpeg reports filter output on stderr
+    for line in proc.stderr.splitlines():
+        m = _SILENCE_START_RE.search(line)
+        if m:
+            start = max(0.0, float(m.group(1)))
+            continue
+        m = _SILENCE_END_RE.search(line)
+        if m and start is not None:
+            gaps.append((start, float(m.group(1))))
+            start = None
+    return gaps
+
+
+def expected_boundaries(weights: Sequence[float], total_seconds: float) -> List[float]:
+    """Estimate where each part should end from its share of the content.
+
+    Args:
+        weights: Relative size of each part, e.g. its word count.
+        total_seconds: Duration of the combined video.
+
+    Returns:
+        `len(weights) - 1` timestamps in seconds, in order.
+    """
+    total = float(sum(weights))
+    if total <= 0:
+        raise ValueError("Part weights must sum to a positive number")
+    cuts: List[float] = []
+    acc = 0.0
+    for w in weights[:-1]:
+        acc += w
+        cuts.append(total_seconds * acc / total)
+    return cuts
+
+
+def pick_boundaries(
+    gaps: Sequence[Tuple[float, float]],
+    expected: Sequence[float],
+    max_offset: float,
+) -> List[float]:
+    """Match each expected cut time to the separator pause around it.
+
+    Among the unused gaps within `max_offset` of an expected time, the
+    longest one is chosen (ties go to the closest), since the pause inserted
+    between scripts outlasts ordinary pauses between sentences. Gaps are
+    used in playback order and each at most once; cuts are placed at the
+    middle of the chosen gap.
+
+    Args:
+        gaps: (start, end) silent gaps as returned by `detect_silences`.
+        expected: Expected cut times in seconds (see `expected_boundaries`).
+        max_offset: Largest allowed distance between an expected time and
+            the middle of the gap chosen for it.
+
+    Returns:
+        Sorted list of cut timestamps in seconds.
+
+    Raises:
+        ValueError: If no unused gap lies within `max_offset` of an expected
+            cut, i.e. the pauses between scripts could not be found.
+    """
+    # Ignore a leading silence; it cannot separate two parts
+    spans = [(start, end) for start, end in gaps if start > 0.0]
+    cuts: List[float] = []
+    for target in expected:
+        candidates = [
+            (end - start, (start + end) / 2.0)
+            for start, end in spans
+            if (not cuts or (start + end) / 2.0 > cuts[-1]) and abs((start + end) / 2.0 - target) <= max_offset
+        ]
+        if not candidates:
+            raise ValueError(
+                f"No unused silent gap within {max_offset:.1f}s of the cut expected at {target:.1f}s"
+            )
+        _, best = max(candidates, key=lambda c: (c[0], -abs(c[1] - target)))
+        cuts.append(best)
+    return cuts
+
+
+def split_video(src: Path, cut_points: Sequence[float], dests: Sequence[Path]) -> None:
+    """Split `src` at `cut_points` and write each segment to `dests`.
+
+    Segments are re-encoded (H.264/AAC) so cuts land exactly on the given
+    timestamps rather than the nearest keyframe.
+
+    Args:
+        src: Source video.
+        cut_points: Sorted timestamps in seconds; `len(dests) - 1` entries.
+        dests: Output paths, one per segment.
+
+    Raises:
+        ValueError: If the number of cut points does not match the outputs.
+        RuntimeError: If ffmpeg is missing or fails.
+    """
+    if len(cut_points) != len(dests) - 1:
+        raise ValueError("Need exactly one cut point between each pair of outputs")
+    exe = _require_ffmpeg()
+
+    bounds = [0.0, *cut_points, None]
+    for idx, dest in enumerate(dests):
+        start, end = bounds[idx], bounds[idx + 1]
+        cmd = [exe, "-hide_banner", "-loglevel", "error", "-y", "-i", str(src), "-ss", f"{start:.3f}"]
+        if end is not None:
+            cmd += ["-to", f"{end:.3f}"]
+        cmd += ["-c:v", "libx264", "-preset", "veryfast", "-c:a", "aac", "-movflags", "+faststart", str(dest)]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        if proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg split failed for {dest.name}: {proc.stderr.strip()[-500:]}")
@@ -0,0 +1,468 @@
+"""
+Priority-aware admission control for outbound OpenAI and FAL calls:
+
+- Two priority classes: "interactive" (a user is waiting) and "bulk"
+  (backfills, overnight series)
+- A shared concurrency limit with slots reserved for interactive work, so
+  bulk jobs only soak up the remaining capacity
+- Fair share between tenants within a class: the next slot goes to the
+  tenant with the fewest calls in flight, then round-robin
+- Per-class queue depth and wait-time stats
+
+Callers wrap each outbound request in `slot(priority, tenant)`. A
+process-wide default scheduler is exposed through the module functions.
+By default it only coordinates threads of one process; `use_shared_dir`
+switches it to lock files in a directory so separate jobs (e.g. an
+interactive upload and an overnight backfill) share one pool of slots.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+try:
+    import fcntl  # POSIX only; shared slots are unavailable without it
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+INTERACTIVE = "interactive"
+BULK = "bulk"
+PRIORITIES = (INTERACTIVE, BULK)  # highest first
+
+
+class _Ticket:
+    """A pending request for a slot."""
+
+    __slots__ = ("priority", "tenant", "enqueued", "name")
+
+    def __init__(self, priority: str, tenant: str, enqueued: Optional[float] = None, name: str = "") -> None:
+        self.priority = priority
+        self.tenant = tenant
+        self.enqueued = time.monotonic() if enqueued is None else enqueued
+        self.name = name
+
+
+def _pick(
+    heads: Dict[str, Dict[str, _Ticket]],
+    running: Dict[str, int],
+    tenant_running: Dict[tuple, int],
+    last_served: Dict[tuple, int],
+    max_concurrency: int,
+    reserved_interactive: int,
+) -> Optional[_Ticket]:
+    """Pick the ticket that should be admitted next, if any can be.
+
+    Args:
+        heads: Oldest waiting ticket per tenant, per priority class.
+        running: Calls in flight per class.
+        tenant_running: Calls in flight per (class, tenant).
+        last_served: Grant sequence number of each (class, tenant)'s last slot.
+        max_concurrency: Total slots.
+        reserved_interactive: Slots bulk work may never occupy.
+    """
+    for priority in PRIORITIES:
+        tenants = heads.get(priority) or {}
+        if not tenants:
+            continue
+        # Lower classes never jump a higher class that is waiting
+        if sum(running.values()) >= max_concurrency:
+            return None
+        if priority == BULK and running.get(BULK, 0) >= max_concurrency - reserved_interactive:
+            return None
+        tenant = min(
+            tenants,
+            key=lambda t: (
+                tenant_running.get((priority, t), 0),
+                last_served.get((priority, t), -1),
+                tenants[t].enqueued,
+            ),
+        )
+        return tenants[tenant]
+    return None
+
+
+class Scheduler:
+    """Thread-safe slot scheduler with priority classes and tenant fair share.
+
+    Args:
+        max_concurrency: Total calls allowed in flight at once.
+        reserved_interactive: Slots bulk work may never occupy. Clamped so
+            that bulk always keeps at least one slot.
+    """
+
+    def __init__(self, max_concurrency: int = 4, reserved_interactive: int = 1) -> None:
+        self._cond = threading.Condition()
+        self._waiting: Dict[str, "OrderedDict[str, Deque[_Ticket]]"] = {p: OrderedDict() for p in PRIORITIES}
+        self._running: Dict[str, int] = {p: 0 for p in PRIORITIES}
+        self._tenant_running: Dict[tuple, int] = {}
+        self._last_served: Dict[tuple, int] = {}
+        self._grants = 0
+        self._stats: Dict[str, Dict[str, float]] = {
+            p: {"completed": 0, "total_wait": 0.0, "max_wait": 0.0} for p in PRIORITIES
+        }
+        self.configure(max_concurrency, reserved_interactive)
+
+    def configure(self, max_concurrency: int, reserved_interactive: Optional[int] = None) -> None:
+        """Change the limits; waiting callers are re-evaluated immediately."""
+        with self._cond:
+            self.max_concurrency = max(1, int(max_concurrency))
+            if reserved_interactive is None:
+                reserved_interactive = getattr(self, "reserved_interactive", 0)
+            self.reserved_interactive = min(max(0, int(reserved_interactive)), self.max_concurrency - 1)
+            self._cond.notify_all()
+
+    def _next_ticket(self) -> Optional[_Ticket]:
+        """Pick the ticket that should be admitted next, if any can be."""
+        heads = {p: {t: q[0] for t, q in self._waiting[p].items()} for p in PRIORITIES}
+        return _pick(
+            heads,
+            self._running,
+            self._tenant_running,
+            self._last_served,
+            self.max_concurrency,
+            self.reserved_interactive,
+        )
+
+    @contextmanager
+    def slot(self, priority: str = INTERACTIVE, tenant: str = "default") -> Iterator[None]:
+        """Block until a slot is granted, then hold it for the `with` body.
+
+        Raises:
+            ValueError: If `priority` is not one of `PRIORITIES`.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}; expected one of {PRIORITIES}")
+        ticket = _Ticket(priority, tenant)
+        key = (priority, tenant)
+        with self._cond:
+            self._waiting[priority].setdefault(tenant, deque()).append(ticket)
+            queue = self._waiting[priority][tenant]
+            try:
+                while self._next_ticket() is not ticket:
+                    self._cond.wait()
+            except BaseException:
+                # Interrupted while waiting: withdraw so others are not blocked
+                queue.remove(ticket)
+                if not queue:
+                    del self._waiting[priority][tenant]
+                self._cond.notify_all()
+                raise
+            queue.popleft()
+            if not queue:
+                del self._waiting[priority][tenant]
+            self._running[priority] += 1
+            self._tenant_running[key] = self._tenant_running.get(key, 0) + 1
+            self._grants += 1
+            self._last_served[key] = self._grants
+            waited = time.monotonic() - ticket.enqueued
+            stats = self._stats[priority]
+            stats["total_wait"] += waited
+            stats["max_wait"] = max(stats["max_wait"], waited)
+            # Another waiter may be admissible too (e.g. a different class)
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._running[priority] -= 1
+                self._tenant_running[key] -= 1
+                if not self._tenant_running[key]:
+                    del self._tenant_running[key]
+                self._stats[priority]["completed"] += 1
+                self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return queue depth, in-flight count and wait times per class."""
+        with self._cond:
+            out: Dict[str, Dict[str, Any]] = {}
+            for priority in PRIORITIES:
+                s = self._stats[priority]
+                admitted = s["completed"] + self._running[priority]
+                out[priority] = {
+                    "queued": sum(len(q) for q in self._waiting[priority].values()),
+                    "running": self._running[priority],
+                    "completed": int(s["completed"]),
+                    "avg_wait_s": round(s["total_wait"] / admitted, 3) if admitted else 0.0,
+                    "max_wait_s": round(s["max_wait"], 3),
+                }
+            return out
+
+
+def _read_json(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+
+
+def _is_locked(path: Path) -> bool:
+    """True if another open file description holds an flock on `path`."""
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT)
+    except FileNotFoundError:
+        return False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return True
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return False
+    finally:
+        os.close(fd)
+
+
+class FileScheduler:
+    """Cross-process variant of `Scheduler` backed by lock files in `root`.
+
+    Layout:
+        state.lock        guards every read/write below
+        state.json        pool limits, grant counter and last grant per (class, tenant)
+        slot-K.lock       flock held by the process using slot K
+        slot-K.json       class and tenant of slot K's holder
+        wait/*.ticket     one per waiting call, flock held by its owner
+
+    Locks die with their process, so crashed holders and waiters are
+    detected by probing the lock and cleaned up on the next scan. The pool's
+    limits are stored in state.json; a job asking for different limits while
+    the pool is busy is rejected (see `configure`).
+    """
+
+    POLL_SECONDS = 0.5
+
+    def __init__(self, root: Path, max_concurrency: int = 4, reserved_interactive: int = 1) -> None:
+        if fcntl is None:  # pragma: no cover
+            raise RuntimeError("Shared scheduler slots need fcntl (POSIX)")
+        self.root = Path(root)
+        (self.root / "wait").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {
+            p: {"admitted": 0, "completed": 0, "total_wait": 0.0, "max_wait": 0.0} for p in PRIORITIES
+        }
+        self.configure(max_concurrency, reserved_interactive)
+
+    def configure(self, max_concurrency: int, reserved_interactive: Optional[int] = None) -> None:
+        """Set the limits of the shared pool, stored in `state.json`.
+
+        Limits can only change while no call holds or waits for a slot;
+        every job sharing `root` then uses the stored limits.
+
+        Raises:
+            RuntimeError: If other calls are using the pool with different limits.
+        """
+        max_concurrency = max(1, int(max_concurrency))
+        if reserved_interactive is None:
+            reserved_interactive = getattr(self, "reserved_interactive", 0)
+        limits = {
+            "max_concurrency": max_concurrency,
+            "reserved_interactive": min(max(0, int(reserved_interactive)), max_concurrency - 1),
+        }
+        with self._state_lock():
+            state = _read_json(self.root / "state.json")
+            stored = state.get("limits")
+            if stored != limits:
+                busy = any(_is_locked(p) for p in self.root.glob("slot-*.lock")) or any(
+                    _is_locked(p) for p in (self.root / "wait").glob("*.ticket")
+                )
+                if stored and busy:
+                    raise RuntimeError(
+                        f"Scheduler dir {self.root} is in use with max_concurrency="
+                        f"{stored.get('max_concurrency')}, reserved_interactive="
+                        f"{stored.get('reserved_interactive')}; got max_concurrency="
+                        f"{limits['max_concurrency']}, reserved_interactive="
+                        f"{limits['reserved_interactive']}. Use the same limits for every job "
+                        f"sharing it, or wait for those jobs to finish"
+                    )
+                state["limits"] = limits
+                _write_json(self.root / "state.json", state)
+        self.max_concurrency = limits["max_concurrency"]
+        self.reserved_interactive = limits["reserved_interactive"]
+
+    def _limits(self, state: Dict[str, Any]) -> Tuple[int, int]:
+        """Limits stored in `state`, falling back to this process's own."""
+        stored = state.get("limits") or {}
+        return (
+            int(stored.get("max_concurrency", self.max_concurrency)),
+            int(stored.get("reserved_interactive", self.reserved_interactive)),
+        )
+
+    @contextmanager
+    def _state_lock(self) -> Iterator[None]:
+        fd = os.open(self.root / "state.lock", os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)  # closing the descriptor releases the flock
+
+    def _scan(
+        self, max_concurrency: int
+    ) -> Tuple[Dict[str, Dict[str, _Ticket]], Dict[str, int], Dict[tuple, int], List[int], Dict[str, int]]:
+        """Read slots and waiting tickets from disk. Caller holds the state lock.
+
+        Every slot file is counted as running, even past `max_concurrency`,
+        but only slots below it are offered as free.
+        """
+        running = {p: 0 for p in PRIORITIES}
+        tenant_running: Dict[tuple, int] = {}
+        held = {int(p.stem.split("-", 1)[1]) for p in self.root.glob("slot-*.lock") if _is_locked(p)}
+        free = [k for k in range(max_concurrency) if k not in held]
+        for k in sorted(held):
+            holder = _read_json(self.root / f"slot-{k}.json")
+            priority = holder.get("priority") if holder.get("priority") in PRIORITIES else BULK
+            key = (priority, str(holder.get("tenant", "")))
+            running[priority] += 1
+            tenant_running[key] = tenant_running.get(key, 0) + 1
+
+        heads: Dict[str, Dict[str, _Ticket]] = {p: {} for p in PRIORITIES}
+        queued = {p: 0 for p in PRIORITIES}
+        for path in (self.root / "wait").glob("*.ticket"):
+            if not _is_locked(path):
+                # Owner exited without cleaning up
+                path.unlink(missing_ok=True)
+                continue
+            info = _read_json(path)
+            if info.get("priority") not in PRIORITIES:
+                continue
+            ticket = _Ticket(info["priority"], str(info.get("tenant", "")), float(info.get("enqueued", 0)), path.name)
+            queued[ticket.priority] += 1
+            current = heads[ticket.priority].get(ticket.tenant)
+            if current is None or ticket.enqueued < current.enqueued:
+                heads[ticket.priority][ticket.tenant] = ticket
+        return heads, running, tenant_running, free, queued
+
+    @contextmanager
+    def slot(self, priority: str = INTERACTIVE, tenant: str = "default") -> Iterator[None]:
+        """Block until a shared slot is granted, then hold it for the `with` body.
+
+        Raises:
+            ValueError: If `priority` is not one of `PRIORITIES`.
+        """
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}; expected one of {PRIORITIES}")
+        name = f"{uuid.uuid4().hex}.ticket"
+        ticket_path = self.root / "wait" / name
+        enqueued = time.time()
+        with self._state_lock():
+            ticket_fd = os.open(ticket_path, os.O_RDWR | os.O_CREAT)
+            fcntl.flock(ticket_fd, fcntl.LOCK_EX)
+            os.write(ticket_fd, json.dumps({"priority": priority, "tenant": tenant, "enqueued": enqueued}).encode())
+
+        slot_fd = None
+        slot_id = -1
+        try:
+            while slot_fd is None:
+                with self._state_lock():
+                    state = _read_json(self.root / "state.json")
+                    max_concurrency, reserved_interactive = self._limits(state)
+                    heads, running, tenant_running, free, _ = self._scan(max_concurrency)
+                    last_served = {
+                        tuple(k.split("|", 1)): v for k, v in (state.get("last_served") or {}).items()
+                    }
+                    nxt = _pick(
+                        heads,
+                        running,
+                        tenant_running,
+                        last_served,
+                        max_concurrency,
+                        reserved_interactive,
+                    )
+                    if nxt is not None and nxt.name == name and free:
+                        slot_id = free[0]
+                        slot_fd = os.open(self.root / f"slot-{slot_id}.lock", os.O_RDWR | os.O_CREAT)
+                        fcntl.flock(slot_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        _write_json(
+                            self.root / f"slot-{slot_id}.json",
+                            {"priority": priority, "tenant": tenant, "pid": os.getpid()},
+                        )
+                        grants = int(state.get("grants", 0)) + 1
+                        state["grants"] = grants
+                        state.setdefault("last_served", {})[f"{priority}|{tenant}"] = grants
+                        _write_json(self.root / "state.json", state)
+                        ticket_path.unlink(missing_ok=True)
+                        break
+                time.sleep(self.POLL_SECONDS)
+        finally:
+            if slot_fd is None:
+                # Interrupted while waiting: withdraw the ticket
+                with self._state_lock():
+                    ticket_path.unlink(missing_ok=True)
+            os.close(ticket_fd)
+
+        waited = time.time() - enqueued
+        with self._lock:
+            stats = self._stats[priority]
+            stats["admitted"] += 1
+            stats["total_wait"] += waited
+            stats["max_wait"] = max(stats["max_wait"], waited)
+        try:
+            yield
+        finally:
+            with self._state_lock():
+                (self.root / f"slot-{slot_id}.json").unlink(missing_ok=True)
+                os.close(slot_fd)
+            with self._lock:
+                self._stats[priority]["completed"] += 1
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Shared queue depth and in-flight counts, plus this process's wait times."""
+        with self._state_lock():
+            max_concurrency, _ = self._limits(_read_json(self.root / "state.json"))
+            _, running, _, _, queued = self._scan(max_concurrency)
+        out: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            for priority in PRIORITIES:
+                s = self._stats[priority]
+                out[priority] = {
+                    "queued": queued[priority],
+                    "running": running[priority],
+                    "completed": int(s["completed"]),
+                    "avg_wait_s": round(s["total_wait"] / s["admitted"], 3) if s["admitted"] else 0.0,
+                    "max_wait_s": round(s["max_wait"], 3),
+                }
+        return out
+
+
+_default: Any = Scheduler()
+
+
+def use_shared_dir(root: Path, max_concurrency: int = 4, reserved_interactive: int = 1) -> None:
+    """Back the process-wide scheduler with lock files under `root`.
+
+    Every process pointing at the same `root` then shares one pool of slots,
+    one priority order and one tenant rotation. Falls back to the in-process
+    scheduler (with the given limits) where fcntl is unavailable.
+    """
+    global _default
+    if fcntl is None:  # pragma: no cover
+        _default.configure(max_concurrency, reserved_interactive)
+        return
+    _default = FileScheduler(root, max_concurrency, reserved_interactive)
+
+
+def configure(max_concurrency: int, reserved_interactive: Optional[int] = None) -> None:
+    """Change the limits of the process-wide scheduler."""
+    _default.configure(max_concurrency, reserved_interactive)
+
+
+def slot(priority: str = INTERACTIVE, tenant: str = "default"):
+    """Hold a slot of the process-wide scheduler for the `with` body."""
+    return _default.slot(priority, tenant)
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """Queue depth and wait-time stats of the process-wide scheduler."""
+    return _default.stats()
@@ -0,0 +1,163 @@
+"""
+Near-duplicate detection for scripts that have already been rendered:
+
+- Normalizes script text (case, contractions, punctuation, whitespace) and
+  splits it into word shingles
+- Summarizes each script as a MinHash signature whose agreement estimates
+  Jaccard similarity
+- Persists signatures with their rendered video paths in a JSON index so
+  later runs can flag or reuse an existing render
+"""
+
+import hashlib
+import random
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .io import read_json, update_json
+
+NUM_PERM = 128
+SHINGLE_SIZE = 3
+
+# Large Mersenne prime for the universal hash family (a * x + b) % p
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)  # fixed seed: signatures must be stable across runs
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+# Common contractions expanded before shingling, so "it's" and "it is" match
+_CONTRACTIONS = {
+    "it's": "it is",
+    "here's": "here is",
+    "that's": "that is",
+    "what's": "what is",
+    "there's": "there is",
+    "let's": "let us",
+    "isn't": "is not",
+    "aren't": "are not",
+    "wasn't": "was not",
+    "don't": "do not",
+    "doesn't": "does not",
+    "didn't": "did not",
+    "can't": "cannot",
+    "won't": "will not",
+    "i'm": "i am",
+    "you're": "you are",
+    "we're": "we are",
+    "they're": "they are",
+    "i've": "i have",
+    "you've": "you have",
+    "we've": "we have",
+    "i'll": "i will",
+    "you'll": "you will",
+    "i'd": "i would",
+    "you'd": "you would",
+}
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, expand contractions, drop punctuation, collapse whitespace."""
+    text = text.lower().replace("’", "'")
+    text = re.sub(r"[a-z]+'[a-z]+", lambda m: _CONTRACTIONS.get(m.group(0), m.group(0)), text)
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+def _shingles(text: str) -> Set[str]:
+    """Return the set of word n-grams of the normalized text."""
+    words = normalize_text(text).split()
+    if len(words) <= SHINGLE_SIZE:
+        return {" ".join(words)}
+    return {" ".join(words[i : i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text: str) -> List[int]:
+    """Compute the MinHash signature of a script."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(sh.encode("utf-8"), digest_size=8).digest(), "big")
+        for sh in _shingles(text)
+    ]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS]
+
+
+def similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimate Jaccard similarity from two signatures of equal length."""
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class SimilarityIndex:
+    """JSON-backed index of rendered scripts keyed by MinHash signature.
+
+    Each entry stores the signature, the rendered video path, (if known)
+    its duration in seconds, so callers can report the render time avoided,
+    and the render parameters (avatar, voice, ...) it was made with. Only
+    entries rendered with identical parameters are ever matched.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        try:
+            data = read_json(self.path)
+        except (OSError, ValueError):
+            data = {}  # an unreadable file is moved aside by `save()`
+        self.entries: List[Dict[str, Any]] = self._usable(data.get("entries") or [])
+
+    @staticmethod
+    def _usable(entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Drop entries built with a different signature size, and entries
+        whose video was deleted (they can never be reused)."""
+        return [
+            e
+            for e in entries
+            if isinstance(e, dict)
+            and len(e.get("signature") or []) == NUM_PERM
+            and Path(e.get("video") or "").is_file()
+        ]
+
+    def find(self, text: str, params: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], float]:
+        """Return the most similar entry rendered with `params` whose video
+        still exists, and its score."""
+        sig = minhash(text)
+        best: Optional[Dict[str, Any]] = None
+        best_score = 0.0
+        for entry in self.entries:
+            if entry.get("params") != params or not Path(entry["video"]).is_file():
+                continue
+            score = similarity(sig, entry["signature"])
+            if score > best_score:
+                best, best_score = entry, score
+        return best, best_score
+
+    def add(
+        self,
+        text: str,
+        video: Path,
+        params: Dict[str, Any],
+        duration: Optional[float] = None,
+    ) -> None:
+        """Record a script rendered with `params`; call `save()` to persist."""
+        self.entries.append(
+            {
+                "signature": minhash(text),
+                "video": str(Path(video).resolve()),
+                "duration": duration,
+                "params": dict(params),
+                "preview": normalize_text(text)[:80],
+            }
+        )
+
+    def save(self) -> None:
+        """Merge the index into the file on disk, creating parent folders as
+        needed. Entries saved meanwhile by other runs are kept; for the same
+        video, this process's entry wins."""
+
+        def merge(current: Dict[str, Any]) -> Dict[str, Any]:
+            by_video = {e["video"]: e for e in self._usable(current.get("entries") or [])}
+            by_video.update((e["video"], e) for e in self.entries)
+            self.entries = list(by_video.values())
+            return {"num_perm": NUM_PERM, "entries": self.entries}
+
+        update_json(self.path, merge)
@@ -0,0 +1,8 @@
+import sys
+from pathlib import Path
+
+# Stage and util modules are imported the same way as when run as scripts
+_SRC = Path(__file__).resolve().parents[1] / "src"
+for path in (_SRC, _SRC / "stages"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
@@ -0,0 +1,52 @@
+from utils import duration
+
+
+def _sentence(words: int) -> str:
+    return " ".join(["word"] * (words - 1) + ["end."])
+
+
+def test_short_script_is_not_split():
+    text = _sentence(20)
+    assert duration.split_script(text, 60, 2.5) == [text]
+
+
+def test_split_balances_parts_instead_of_leaving_a_tail():
+    # 297 words at 150 words per part: two parts, not [136, 144, 17]
+    sizes = [40, 48, 48, 12, 48, 56, 45]
+    text = " ".join(_sentence(n) for n in sizes)
+    parts = duration.split_script(text, 60, 2.5)
+    counts = [duration.count_words(p) for p in parts]
+    assert len(parts) == 2
+    assert sum(counts) == 297
+    assert all(c <= 150 for c in counts)
+    assert min(counts) > 100
+
+
+def test_overlong_sentence_is_kept_whole():
+    text = " ".join([_sentence(10), _sentence(200), _sentence(10)])
+    parts = duration.split_script(text, 60, 2.5)
+    assert [duration.count_words(p) for p in parts] == [10, 200, 10]
+
+
+def test_extra_part_only_when_sentences_force_it():
+    # No sentence boundary gives two parts under 150 words, so three balanced parts
+    sizes = [40, 48, 48, 40, 48, 56, 17]
+    text = " ".join(_sentence(n) for n in sizes)
+    counts = [duration.count_words(p) for p in duration.split_script(text, 60, 2.5)]
+    assert len(counts) == 3
+    assert all(60 <= c <= 150 for c in counts)
+
+
+def test_rates_from_concurrent_runs_are_summed(tmp_path):
+    path = tmp_path / "voice_rates.json"
+    first = duration.SpeechRates(path)
+    second = duration.SpeechRates(path)
+    for _ in range(2):
+        first.record("Rachel", _sentence(30), 10.0)
+    second.record("Rachel", _sentence(30), 10.0)
+    first.save()
+    second.save()
+
+    rates = duration.SpeechRates(path)
+    assert rates.voices["Rachel"]["samples"] == 3
+    assert rates.words_per_second("Rachel") == 3.0
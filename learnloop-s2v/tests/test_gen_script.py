@@ -0,0 +1,30 @@
+import json
+
+import gen_script
+
+
+def _embedded_example() -> str:
+    text = gen_script.UGC_SINGLE_SCRIPT_INSTRUCTIONS
+    start = text.index("a strong answer looks like:\n\n") + len("a strong answer looks like:\n\n")
+    end = text.index("\n\nWhy this example works")
+    return text[start:end]
+
+
+def test_worked_example_is_valid_json():
+    data = json.loads(_embedded_example())
+    assert data == gen_script._WORKED_EXAMPLE
+    assert set(data) == {"topic", "characters", "script"}
+
+
+def test_worked_example_lines_follow_length_rule():
+    for key, value in gen_script._WORKED_EXAMPLE["script"].items():
+        if key == "script no.":
+            continue
+        for line in value.split("\n"):
+            assert len(line) <= 60, line
+
+
+def test_instructions_are_static():
+    # No template placeholders left: the prefix must be byte-identical per call
+    assert "{count}" not in gen_script.UGC_SINGLE_SCRIPT_INSTRUCTIONS
+    assert "3 videos" in gen_script._build_generation_input("src", 3)
@@ -0,0 +1,19 @@
+import pytest
+
+from utils import media
+
+
+def test_pick_boundaries_prefers_longest_gap_in_window():
+    # A short sentence pause sits right at the estimate; the separator is nearby
+    gaps = [(0.0, 0.5), (29.6, 30.4), (32.0, 34.5), (50.0, 50.9)]
+    assert media.pick_boundaries(gaps, [30.0], 5.0) == [33.25]
+
+
+def test_pick_boundaries_breaks_ties_by_distance():
+    gaps = [(26.0, 27.0), (30.5, 31.5)]
+    assert media.pick_boundaries(gaps, [30.0], 5.0) == [31.0]
+
+
+def test_pick_boundaries_raises_when_no_gap_in_window():
+    with pytest.raises(ValueError):
+        media.pick_boundaries([(10.0, 12.0)], [30.0], 5.0)
@@ -0,0 +1,19 @@
+import pytest
+
+from utils import scheduler
+
+
+def test_shared_dir_stores_limits_and_rejects_mismatch_while_busy(tmp_path):
+    first = scheduler.FileScheduler(tmp_path, max_concurrency=4, reserved_interactive=1)
+    with first.slot(scheduler.BULK, "backfill"):
+        with pytest.raises(RuntimeError, match="max_concurrency=4"):
+            scheduler.FileScheduler(tmp_path, max_concurrency=2, reserved_interactive=1)
+        same = scheduler.FileScheduler(tmp_path, max_concurrency=4, reserved_interactive=1)
+        assert same.stats()[scheduler.BULK]["running"] == 1
+
+    # Once the pool is idle the limits may change
+    scheduler.FileScheduler(tmp_path, max_concurrency=2, reserved_interactive=0)
+    assert scheduler._read_json(tmp_path / "state.json")["limits"] == {
+        "max_concurrency": 2,
+        "reserved_interactive": 0,
+    }
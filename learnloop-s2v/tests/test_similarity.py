@@ -0,0 +1,67 @@
+from utils import similarity
+
+SCRIPT = (
+    "Ever wondered why the sky is blue? It is Rayleigh scattering, and here is "
+    "the story of how light bends around tiny molecules in the air."
+)
+VARIANT = (
+    "Ever wondered why the sky is blue?! It’s Rayleigh scattering -- and here’s "
+    "the story of how light bends around tiny molecules in the air"
+)
+PARAMS = {"avatar": "A", "voice": "Rachel", "remove_background": False, "fal_model": "m"}
+
+
+def test_near_duplicate_scores_above_default_threshold():
+    score = similarity.similarity(similarity.minhash(SCRIPT), similarity.minhash(VARIANT))
+    assert score >= 0.7
+
+
+def test_find_requires_matching_render_params(tmp_path):
+    video = tmp_path / "a.mp4"
+    video.write_bytes(b"x")
+    index = similarity.SimilarityIndex(tmp_path / "index.json")
+    index.add(SCRIPT, video, PARAMS, 30.0)
+
+    match, _ = index.find(VARIANT, PARAMS)
+    assert match is not None
+    other_voice = dict(PARAMS, voice="Adam")
+    assert index.find(VARIANT, other_voice) == (None, 0.0)
+
+
+def test_find_skips_deleted_videos(tmp_path):
+    gone, kept = tmp_path / "gone.mp4", tmp_path / "kept.mp4"
+    gone.write_bytes(b"x")
+    kept.write_bytes(b"x")
+    index = similarity.SimilarityIndex(tmp_path / "index.json")
+    index.add(SCRIPT, gone, PARAMS)
+    index.add(SCRIPT + " Wow.", kept, PARAMS)
+    gone.unlink()
+
+    match, _ = index.find(VARIANT, PARAMS)
+    assert match["video"] == str(kept.resolve())
+
+
+def test_save_merges_entries_from_concurrent_runs(tmp_path):
+    path = tmp_path / "index.json"
+    videos = [tmp_path / f"{n}.mp4" for n in range(2)]
+    for v in videos:
+        v.write_bytes(b"x")
+    first = similarity.SimilarityIndex(path)
+    second = similarity.SimilarityIndex(path)
+    first.add(SCRIPT, videos[0], PARAMS)
+    second.add("A different script about volcanoes and lava.", videos[1], PARAMS)
+    first.save()
+    second.save()
+
+    merged = similarity.SimilarityIndex(path)
+    assert sorted(e["video"] for e in merged.entries) == sorted(str(v.resolve()) for v in videos)
+
+
+def test_corrupt_index_is_moved_aside(tmp_path):
+    path = tmp_path / "index.json"
+    path.write_text('{"entries": [', encoding="utf-8")
+    index = similarity.SimilarityIndex(path)
+    assert index.entries == []
+    index.save()
+    assert (tmp_path / "index.json.corrupt").read_text(encoding="utf-8") == '{"entries": ['
+    assert similarity.SimilarityIndex(path).entries == []